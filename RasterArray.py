@@ -4,6 +4,7 @@
  V0.05a
  
  Dependencies: QGIS 2.6.1 Brighton, Python 2.7
+ Optional: SciPy, numba, cffi
  Developed on: Windows 8 64-bit
  
 ===============================================================
@@ -13,23 +14,48 @@
  
  Modules: Submodules
  -------------------
- * osgeo: gdal, osr
+ * osgeo: gdal, osr, gdal_array
  * qgis: core, qgsMapLayerRegistry, QgsRasterLayer
+ * PyQt4: QtCore, QTimer
  * numpy
+ * scipy: ndimage (optional)
+ * numba: njit, prange (optional)
+ * cffi (optional)
  * os
  * time
  * shutil
+ * multiprocessing: pool
  
  Helpers
  -------
  * (H1.) Array2Raster
  * (H2.) xyOffset
  * (H3.) createDirectory
+ * (H4.) lifeStep
+ * (H5.) lifeConvolve
+ * (H6.) packBoard
+ * (H7.) unpackBoard
+ * (H8.) lifeBits
+ * (H9.) createRaster
+ * (H10.) Array2Dataset
+ * (H11.) lifeHalo
+ * (H12.) lifeTiled
+ * (H13.) randomBoard
+ * (H14.) compileLife
+ * (H15.) wrapBoard
+ * (H16.) haloViews
+ * (H17.) applyRule
+ * (H18.) readCache
+ * (H19.) writeCache
+ * (H20.) wrapBorder
  
  Classes: Methods
  ----------------
- * (1.) Cells: get, modify, toRaster
- * (2.) GameofLife: cycle, reset
+ * (1.) Cells: get, modify, toRaster, modifyBulk,
+               getIJ, modifyIJ, modifyRegion, getRegion,
+               __getitem__, __setitem__, _offset, fromArray,
+               origin, cellWidth, cellHeight, _setAttributes
+ * (2.) GameofLife: cycle, reset, run, animate, _display
    
 ===============================================================
 '''
@@ -37,14 +63,45 @@
 # =============================================================
 # A. Modules
 # =============================================================
-from osgeo import gdal, osr
-import qgis, numpy, os, time, shutil
+from osgeo import gdal, osr, gdal_array
+import qgis, numpy, os, time, shutil, multiprocessing
+from multiprocessing.pool import ThreadPool
+try:
+    from scipy.ndimage import convolve
+except ImportError:
+    convolve = None
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = xrange
+try:
+    import cffi
+except ImportError:
+    cffi = None
 from qgis.core import QgsMapLayerRegistry, QgsRasterLayer
+from PyQt4.QtCore import QTimer
+
+## GDAL settings for repeated raster writes, unless already set
+if gdal.GetConfigOption('GDAL_CACHEMAX') is None:
+    gdal.SetConfigOption('GDAL_CACHEMAX', '512')
+if gdal.GetConfigOption('GDAL_DISABLE_READDIR_ON_OPEN') is None:
+    gdal.SetConfigOption('GDAL_DISABLE_READDIR_ON_OPEN', 'TRUE')
 
 # =============================================================
 # B. Helpers
 # =============================================================
 
+## neighbourhood kernel, counts the 8 cells around each cell
+NEIGHBORS = numpy.array([[1,1,1],
+                         [1,0,1],
+                         [1,1,1]], dtype=numpy.uint8)
+
+## next state of a cell, indexed by (alive << 4) | alive neighbours
+RULE = numpy.zeros(32, dtype=numpy.uint8)
+RULE[3] = 1 ## dead with 3 neighbours is born
+RULE[16+2] = RULE[16+3] = 1 ## alive with 2 or 3 neighbours survives
+
 '''
  (H1.) Array2Raster: numpyArray str (tupleof float) str
                      (tupleof float) float float int -> Effect
@@ -59,6 +116,8 @@ from qgis.core import QgsMapLayerRegistry, QgsRasterLayer
  * Modified from Python GDAL/OGR Cookbook 1.0 @
    http://pcjericks.github.io/py-gdalogr-cookbook/
   raster_layers.html#create-raster-from-array
+ * The raster is created with createRaster as tiled, deflate
+   compressed bytes
 
  Required Parameters
  -------------------
@@ -93,34 +152,19 @@ def Array2Raster(inArray,
     # (H1.1) Obtain Array Information
     cols = inArray.shape[1]
     rows = inArray.shape[0]
-    originX = rasterOrigin[0]
-    originY = rasterOrigin[1]
     
     # (H1.2) Write Array to Raster       
-    driver = gdal.GetDriverByName('GTiff')
-    outRaster = driver.Create(outRaster,
-                              cols,
-                              rows,
-                              1,
-                              gdal.GDT_Byte)
-    outRaster.SetGeoTransform((originX,
-                               pixelWidth,
-                               0,
-                               originY,
-                               0,
-                               pixelHeight))
-    outband = outRaster.GetRasterBand(1)
-    outband.WriteArray(inArray,0,0)
-    outRasterSRS = osr.SpatialReference()
-    outRasterSRS.ImportFromEPSG(EPSG)
-    outRaster.SetProjection(outRasterSRS.ExportToWkt())
-    outband.FlushCache()
-    outband.SetNoDataValue(-99)
+    outRaster = createRaster(outRaster,
+                             cols,
+                             rows,
+                             rasterOrigin,
+                             pixelWidth,
+                             pixelHeight,
+                             EPSG)
+    Array2Dataset(inArray, outRaster)
     
     # (H1.3) Reset
-    driver = None
     outRaster = None
-    outBand = None
     inArray = None
     
 '''
@@ -144,40 +188,826 @@ def Array2Raster(inArray,
  * cellHeight: float
          The height of a cell in the raster.
  
- Output
- ------
- A tuple of integers representing the array position from
- the geographic coordinates [rasterOrigin].
+ Output
+ ------
+ A tuple of integers representing the array position from
+ the geographic coordinates [rasterOrigin].
+
+---------------------------------------------------------------
+'''
+def xyOffset (x, y, rasterOrigin, cellWidth, cellHeight):
+    xOffset = int((x - rasterOrigin[0])/cellWidth) ## X
+    yOffset = int(((y+1) - rasterOrigin[1])/cellHeight) ## Y
+    return (xOffset, yOffset)
+
+'''
+ (H3.) createDirectory: str -> Effect
+---------------------------------------------------------------
+ 
+ Creates a directory.
+ 
+ Required Parameters
+ -------------------
+ * directory: str
+         The path to create the folder at.
+ 
+ Effects
+ -------
+ Creates a folder at the [directory], it the folder does
+ not exist.
+
+---------------------------------------------------------------
+'''
+def createDirectory(directory):    
+    if not os.path.exists(directory):
+	os.makedirs(directory)
+    return directory
+
+'''
+ (H4.) lifeStep: numpyArray numpyArray -> Effect
+---------------------------------------------------------------
+ 
+ Computes the next Game of Life generation of a board, with
+ the board edges wrapped around.
+ 
+ Notes
+ -----
+ * Compiled to parallel native loops over the rows when numba
+   is available
+ * Wrapped neighbour indices are looked up in tables made once
+   per call, instead of a modulo for every cell
+ * The next state of each cell is looked up in the RULE table
+   from its state and neighbours, instead of branching on them
+ 
+ Required Parameters
+ -------------------
+ * board: numpyArray
+         The current board of dead (0) and alive (1) cells.
+ * out: numpyArray
+         An array of the same shape as [board] to hold the
+         next generation.
+ 
+ Effects
+ -------
+ Mutates [out] with the next generation of [board]
+
+---------------------------------------------------------------
+'''
+def lifeStep(board, out):
+    rows, cols = board.shape
+    
+    # (H4.1) Wrapped Indices, Position k+1 Holds Row or Column k
+    wrapRows = numpy.empty(rows+2, dtype=numpy.intp)
+    wrapRows[1:-1] = numpy.arange(rows)
+    wrapRows[0] = rows-1
+    wrapRows[-1] = 0
+    wrapCols = numpy.empty(cols+2, dtype=numpy.intp)
+    wrapCols[1:-1] = numpy.arange(cols)
+    wrapCols[0] = cols-1
+    wrapCols[-1] = 0
+    
+    # (H4.2) Count Neighbours and Apply Rules to Each Cell
+    for i in prange(rows):
+        up = wrapRows[i]
+        down = wrapRows[i+2]
+        for j in range(cols):
+            left = wrapCols[j]
+            right = wrapCols[j+2]
+            sumNeighbors = (board[up,left] + board[up,j] + board[up,right] +
+                            board[i,left] + board[i,right] +
+                            board[down,left] + board[down,j] + board[down,right])
+            ## masked to stay in the table for boards not of 0 and 1
+            out[i,j] = RULE[((board[i,j] != 0) << 4) | (sumNeighbors & 15)]
+
+if njit is not None:
+    lifeStep = njit(cache=True, parallel=True)(lifeStep)
+
+'''
+ (H5.) lifeConvolve: numpyArray numpyArray -> Effect
+---------------------------------------------------------------
+ 
+ Computes the next Game of Life generation of a board with a
+ single wrap-mode convolution counting the neighbours of every
+ cell.
+ 
+ Required Parameters
+ -------------------
+ * board: numpyArray
+         The current board of dead (0) and alive (1) cells.
+ * out: numpyArray
+         An array of the same shape as [board] to hold the
+         next generation.
+ 
+ Effects
+ -------
+ Mutates [out] with the next generation of [board]
+
+---------------------------------------------------------------
+'''
+def lifeConvolve(board, out):
+    sumNeighbors = convolve(board, NEIGHBORS, mode='wrap')
+    applyRule(sumNeighbors, board, out)
+
+'''
+ (H6.) packBoard: numpyArray -> numpyArray
+---------------------------------------------------------------
+ 
+ Packs a board of dead (0) and alive (1) cells into 64 bit
+ words, 64 cells per word along each row.
+ 
+ Notes
+ -----
+ * The first cell of each word is its most significant bit
+ * Unused bits in the last word of each row are set to 0
+ 
+ Required Parameters
+ -------------------
+ * board: numpyArray
+         The board of dead (0) and alive (1) cells.
+ 
+ Output
+ ------
+ A uint64 numpy array of shape (rows, ceil(cols/64))
+ holding the cells of [board].
+
+---------------------------------------------------------------
+'''
+def packBoard(board):
+    rows, cols = board.shape
+    words = (cols+63)//64
+    packed = numpy.zeros((rows, words*8), dtype=numpy.uint8)
+    packed[:,:(cols+7)//8] = numpy.packbits(board != 0, axis=1)
+    return packed.view('>u8').astype(numpy.uint64)
+
+'''
+ (H7.) unpackBoard: numpyArray int -> numpyArray
+---------------------------------------------------------------
+ 
+ Unpacks a board packed by packBoard back into one cell per
+ byte.
+ 
+ Required Parameters
+ -------------------
+ * packed: numpyArray
+         The uint64 packed board.
+ * cols: int
+         The number of columns in the unpacked board.
+ 
+ Output
+ ------
+ A uint8 numpy array of shape (rows, [cols]) of dead (0) and
+ alive (1) cells.
+
+---------------------------------------------------------------
+'''
+def unpackBoard(packed, cols):
+    rows = packed.shape[0]
+    packed = packed.astype('>u8').view(numpy.uint8).reshape(rows, -1)
+    return numpy.unpackbits(packed, axis=1)[:,:cols]
+
+'''
+ (H8.) lifeBits: numpyArray numpyArray int -> Effect
+---------------------------------------------------------------
+ 
+ Computes the next Game of Life generation of a board packed
+ by packBoard, updating 64 cells with each bitwise operation.
+ 
+ Notes
+ -----
+ * The cells left, right and in the centre of each row are
+   added with full adders into 2 bit row sums, and the row
+   sums above and below each row are rolled onto it and added
+   with ripple carry adders into 3 sum planes
+ * A count of 8 wraps around to 0, which gives the same
+   result as both counts kill or leave a cell dead
+ 
+ Required Parameters
+ -------------------
+ * board: numpyArray
+         The current packed board.
+ * out: numpyArray
+         An array of the same shape as [board] to hold the
+         next packed generation.
+ * cols: int
+         The number of columns in the unpacked board.
+ 
+ Effects
+ -------
+ Mutates [out] with the next generation of [board]
+
+---------------------------------------------------------------
+'''
+def lifeBits(board, out, cols):
+    one = numpy.uint64(1)
+    top = numpy.uint64(63)
+    last = numpy.uint64(63 - (cols-1)%64) ## shift of the last cell
+    
+    # (H8.1) Shift Rows Left and Right with Wrapped Edges
+    ## west holds the cell to the left, east the cell to the right
+    west = board >> one
+    west[:,1:] |= board[:,:-1] << top
+    west[:,0] |= ((board[:,-1] >> last) & one) << top
+    east = board << one
+    east[:,:-1] |= board[:,1:] >> top
+    east[:,-1] |= (board[:,0] >> top) << last
+    
+    # (H8.2) Add the Left, Centre and Right Cells of Each Row
+    ## full adder for rows above and below, 0 to 3 as 2 bits
+    rowSum0 = west ^ board ^ east
+    rowSum1 = (west & board) | (east & (west ^ board))
+    ## half adder for the cell's own row, without the cell itself
+    midSum0 = west ^ east
+    midSum1 = west & east
+    
+    # (H8.3) Add the Rows Above and Below with a Ripple Carry
+    upSum0 = numpy.roll(rowSum0, 1, axis=0)
+    upSum1 = numpy.roll(rowSum1, 1, axis=0)
+    downSum0 = numpy.roll(rowSum0, -1, axis=0)
+    downSum1 = numpy.roll(rowSum1, -1, axis=0)
+    s0 = upSum0 ^ downSum0
+    carry = upSum0 & downSum0
+    s1 = upSum1 ^ downSum1 ^ carry
+    s2 = (upSum1 & downSum1) | (carry & (upSum1 ^ downSum1))
+    
+    # (H8.4) Add the Cell's Own Row with a Ripple Carry
+    carry = s0 & midSum0
+    s0 ^= midSum0
+    carry2 = (s1 & midSum1) | (carry & (s1 ^ midSum1))
+    s1 ^= midSum1 ^ carry
+    s2 ^= carry2
+    
+    # (H8.5) Apply Rules, 3 Neighbours or Alive with 2 Neighbours
+    out[...] = s1 & ~s2 & (s0 | board)
+    out[:,-1] &= ~((one << last) - one) ## clear unused bits
+
+'''
+ (H9.) createRaster: str int int (tupleof float) float float
+                     int bool -> gdalDataset
+---------------------------------------------------------------
+
+ Creates an empty single band geotif raster (.tif) that stays
+ open for writing arrays into it.
+ 
+ Notes
+ -----
+ * Tiles are multiples of 16 cells, at most 256 by 256
+ 
+ Required Parameters
+ -------------------
+ * outRaster: str
+         The output raser path with geotif extenstion (.tif).
+ * cols: int
+         The number of columns in the raster.
+ * rows: int
+         The number of rows in the raster.
+ * rasterOrigin: (tupleof float)
+         The geographic origin of the output raster.
+ * pixelWidth: float
+         The width of a cell in the raster.
+ * pixelHeight: float
+         The height of a cell in the raster.
+ * EPSG: int
+         The spatial reference system number to define the
+         raster in.
+ 
+ Optional Parameters
+ -------------------
+ * compress: bool
+         Whether or not to deflate compress the raster.
+           - If True, compress the raster once written
+           - If False, leave the raster uncompressed so it can
+             be rewritten in place
+ 
+ Output
+ ------
+ The open gdal dataset of the raster at [outRaster].
+
+---------------------------------------------------------------
+'''
+def createRaster(outRaster,
+                 cols,
+                 rows,
+                 rasterOrigin,
+                 pixelWidth,
+                 pixelHeight,
+                 EPSG,
+                 compress=True):
+    options = ['TILED=YES',
+               'BLOCKXSIZE=%d' % min(256, (cols+15)//16*16),
+               'BLOCKYSIZE=%d' % min(256, (rows+15)//16*16)]
+    if compress:
+        options += ['COMPRESS=DEFLATE', 'NUM_THREADS=ALL_CPUS']
+    driver = gdal.GetDriverByName('GTiff')
+    dataset = driver.Create(outRaster,
+                            cols,
+                            rows,
+                            1,
+                            gdal.GDT_Byte,
+                            options=options)
+    dataset.SetGeoTransform((rasterOrigin[0],
+                             pixelWidth,
+                             0,
+                             rasterOrigin[1],
+                             0,
+                             pixelHeight))
+    datasetSRS = osr.SpatialReference()
+    datasetSRS.ImportFromEPSG(EPSG)
+    dataset.SetProjection(datasetSRS.ExportToWkt())
+    return dataset
+
+'''
+ (H10.) Array2Dataset: numpyArray gdalDataset -> Effect
+---------------------------------------------------------------
+
+ Writes a numpy array into the first band of an open raster
+ dataset and flushes it to disk.
+ 
+ Required Parameters
+ -------------------
+ * inArray: numpyArray
+         The numpy array to write, with the same shape as the
+         raster.
+ * dataset: gdalDataset
+         The open raster dataset, as from createRaster.
+ 
+ Effects
+ -------
+ * Overwrites the cells of [dataset] with [inArray]
+
+---------------------------------------------------------------
+'''
+def Array2Dataset(inArray, dataset):
+    inArray = numpy.ascontiguousarray(inArray) ## written without a copy
+    if inArray.dtype == numpy.bool_: ## write boolean boards as bytes
+        inArray = inArray.view(numpy.uint8)
+    dataset.GetRasterBand(1).WriteArray(inArray,0,0)
+    dataset.FlushCache()
+
+'''
+ (H11.) lifeHalo: numpyArray numpyArray numpyArray
+                  (listof numpyArray) -> Effect
+---------------------------------------------------------------
+ 
+ Computes the next Game of Life generation of a board by adding
+ the 8 neighbouring views of the board padded with its wrapped
+ edges.
+ 
+ Notes
+ -----
+ * Only needs numpy, for when neither numba nor scipy are
+   available
+ * The views are slices of the padded board, so no shifted
+   copies of the board are made and no modulo is needed for
+   the wrapped edges
+ * Given a board that is the inside of [padded], and the views
+   of [padded] from haloViews, only the border is refilled for
+   each generation, otherwise the whole board is copied into
+   the padding
+ 
+ Required Parameters
+ -------------------
+ * board: numpyArray
+         The current board of dead (0) and alive (1) cells.
+ * out: numpyArray
+         An array of the same shape as [board] to hold the
+         next generation.
+ 
+ Optional Parameters
+ -------------------
+ * padded: numpyArray
+         An array with 2 more rows and columns than [board] to
+         pad the board in.
+           - If None, a new array is made
+ * views: (listof numpyArray)
+         The 8 neighbour views of [padded] from haloViews.
+           - If None, the views are made for this generation
+           - If given, [board] must be padded[1:-1,1:-1]
+ 
+ Effects
+ -------
+ Mutates [out] with the next generation of [board]
+
+---------------------------------------------------------------
+'''
+def lifeHalo(board, out, padded=None, views=None):
+    if views is None:
+        padded = wrapBoard(board, padded)
+        views = haloViews(padded)
+    else:
+        wrapBorder(padded) ## [board] is already inside [padded]
+    sumNeighbors = views[0] + views[1]
+    for view in views[2:]:
+        sumNeighbors += view
+    applyRule(sumNeighbors, board, out)
+
+'''
+ (H12.) lifeTiled: numpyArray numpyArray int ThreadPool
+                   -> Effect
+---------------------------------------------------------------
+ 
+ Computes the next Game of Life generation of a board one
+ square tile at a time, so that the cells and neighbours of a
+ tile stay in the processor cache while they are added.
+ 
+ Notes
+ -----
+ * The board is padded once with its wrapped edges, giving
+   each tile a border of neighbours
+ * Only needs numpy, for large boards when neither numba nor
+   scipy are available
+ * Tiles only write their own part of [out], so they can be
+   computed in parallel threads, numpy releasing the GIL while
+   adding them
+ 
+ Required Parameters
+ -------------------
+ * board: numpyArray
+         The current board of dead (0) and alive (1) cells.
+ * out: numpyArray
+         An array of the same shape as [board] to hold the
+         next generation.
+ 
+ Optional Parameters
+ -------------------
+ * tile: int
+         The number of rows and columns in each tile.
+ * pool: ThreadPool
+         The threads to compute the tiles with.
+           - If None, compute the tiles one after another
+           - If ThreadPool, compute the tiles in its threads
+ 
+ Effects
+ -------
+ Mutates [out] with the next generation of [board]
+
+---------------------------------------------------------------
+'''
+def lifeTiled(board, out, tile=256, pool=None):
+    rows, cols = board.shape
+    padded = wrapBoard(board)
+    def lifeTile(origin):
+        i0, j0 = origin
+        
+        # (H12.1) Add Neighbours of the Tile from the Padded Board
+        height = min(tile, rows-i0)
+        width = min(tile, cols-j0)
+        block = padded[i0:i0+height+2, j0:j0+width+2]
+        sumNeighbors = numpy.zeros((height, width), dtype=numpy.uint8)
+        for dy in (0,1,2):
+            for dx in (0,1,2):
+                if (dy,dx) != (1,1):
+                    sumNeighbors += block[dy:dy+height, dx:dx+width]
+        
+        # (H12.2) Apply Rules to the Tile
+        cells = block[1:-1,1:-1]
+        applyRule(sumNeighbors, cells, out[i0:i0+height, j0:j0+width])
+    
+    # (H12.3) Compute Each Tile, in Parallel if Threads are Given
+    origins = [(i0, j0) for i0 in xrange(0, rows, tile)
+                        for j0 in xrange(0, cols, tile)]
+    if pool is None:
+        for origin in origins:
+            lifeTile(origin)
+    else:
+        pool.map(lifeTile, origins)
+
+'''
+ (H13.) randomBoard: int int int -> numpyArray
+---------------------------------------------------------------
+ 
+ Creates a board of randomly dead (0) and alive (1) cells.
+ 
+ Notes
+ -----
+ * Random bytes are unpacked into 8 cells each, instead of
+   drawing a number for every cell
+ * Uses the numpy PCG64 generator if available, and the
+   legacy Mersenne Twister generator otherwise
+ 
+ Required Parameters
+ -------------------
+ * rows: int
+         The number of rows in the board.
+ * cols: int
+         The number of columns in the board.
+ 
+ Optional Parameters
+ -------------------
+ * seed: int
+         The seed of the random generator.
+           - If None, the board is different each time
+           - If int, the same board is created for the seed
+ 
+ Output
+ ------
+ A uint8 numpy array of shape ([rows], [cols]).
+
+---------------------------------------------------------------
+'''
+def randomBoard(rows, cols, seed=None):
+    nbytes = rows*((cols+7)//8)
+    if hasattr(numpy.random, 'default_rng'):
+        data = numpy.random.default_rng(seed).bytes(nbytes)
+    else:
+        data = numpy.random.RandomState(seed).bytes(nbytes)
+    bits = numpy.frombuffer(data, dtype=numpy.uint8).reshape(rows, -1)
+    return numpy.ascontiguousarray(numpy.unpackbits(bits, axis=1)[:,:cols])
+
+'''
+ (H14.) compileLife: int int -> function
+---------------------------------------------------------------
+ 
+ Compiles a C Game of Life step for boards of one size, with
+ the rows and columns fixed in the source so the compiler can
+ unroll and vectorize the loop over the columns.
+ 
+ Notes
+ -----
+ * Requires cffi and a C compiler
+ * Compiled steps are kept for each board size, so a size is
+   only compiled once
+ 
+ Required Parameters
+ -------------------
+ * rows: int
+         The number of rows in the board.
+ * cols: int
+         The number of columns in the board.
+ 
+ Output
+ ------
+ A function taking a contiguous uint8 board and an array of
+ the same shape, mutating the array with the next generation
+ of the board.
+
+---------------------------------------------------------------
+'''
+compiledLife = {} ## compiled steps by (rows, cols)
+def compileLife(rows, cols):
+    if (rows, cols) in compiledLife:
+        return compiledLife[(rows, cols)]
+    
+    # (H14.1) Compile C Source with the Board Size Defined
+    source = '''
+    #define ROWS %d
+    #define COLS %d
+    static unsigned char cell(const unsigned char *up,
+                              const unsigned char *mid,
+                              const unsigned char *down,
+                              int l, int j, int r) {
+        int n = up[l] + up[j] + up[r] + mid[l] + mid[r] +
+                down[l] + down[j] + down[r];
+        return (n == 3) | (mid[j] & (n == 2));
+    }
+    void life_step(const unsigned char *board, unsigned char *out) {
+        int i, j;
+        for (i = 0; i < ROWS; i++) {
+            const unsigned char *up = board + (i == 0 ? ROWS-1 : i-1)*COLS;
+            const unsigned char *mid = board + i*COLS;
+            const unsigned char *down = board + (i == ROWS-1 ? 0 : i+1)*COLS;
+            unsigned char *row = out + i*COLS;
+            row[0] = cell(up, mid, down, COLS-1, 0, COLS > 1 ? 1 : 0);
+            for (j = 1; j < COLS-1; j++)
+                row[j] = cell(up, mid, down, j-1, j, j+1);
+            if (COLS > 1)
+                row[COLS-1] = cell(up, mid, down, COLS-2, COLS-1, 0);
+        }
+    }
+    ''' % (rows, cols)
+    if os.name == 'nt':
+        flags = ['/O2']
+    else:
+        flags = ['-O3', '-march=native', '-ftree-vectorize']
+    ffi = cffi.FFI()
+    ffi.cdef('void life_step(const unsigned char *, unsigned char *);')
+    lib = ffi.verify(source, extra_compile_args=flags)
+    
+    # (H14.2) Pass the Array Buffers to the Compiled Step
+    def lifeCompiled(board, out):
+        lib.life_step(ffi.cast('const unsigned char *', board.ctypes.data),
+                      ffi.cast('unsigned char *', out.ctypes.data))
+    compiledLife[(rows, cols)] = lifeCompiled
+    return lifeCompiled
+
+'''
+ (H15.) wrapBoard: numpyArray numpyArray -> numpyArray
+---------------------------------------------------------------
+ 
+ Pads a board with a border of one cell holding its wrapped
+ edges, so that the neighbours of every cell can be read with
+ slices.
+ 
+ Notes
+ -----
+ * Copies the whole board, wrapBorder only refills the border
+   of a board already inside its padding
+ 
+ Required Parameters
+ -------------------
+ * board: numpyArray
+         The board of dead (0) and alive (1) cells.
+ 
+ Optional Parameters
+ -------------------
+ * padded: numpyArray
+         An array with 2 more rows and columns than [board] to
+         hold the padded board.
+           - If None, a new array is made
+ 
+ Output
+ ------
+ Returns the padded board
+
+---------------------------------------------------------------
+'''
+def wrapBoard(board, padded=None):
+    rows, cols = board.shape
+    if padded is None:
+        padded = numpy.empty((rows+2, cols+2), dtype=board.dtype)
+    padded[1:-1,1:-1] = board
+    wrapBorder(padded)
+    return padded
+
+'''
+ (H16.) haloViews: numpyArray -> (listof numpyArray)
+---------------------------------------------------------------
+ 
+ Makes the 8 views of a padded board that hold the neighbours
+ of each cell, one for each direction.
+ 
+ Notes
+ -----
+ * The views share memory with [padded], so they follow the
+   cells written into it by wrapBoard or wrapBorder and can be
+   made once for many generations
+ 
+ Required Parameters
+ -------------------
+ * padded: numpyArray
+         A board padded by wrapBoard.
+ 
+ Output
+ ------
+ Returns a list of the 8 neighbour views of [padded]
+
+---------------------------------------------------------------
+'''
+def haloViews(padded):
+    rows = padded.shape[0] - 2
+    cols = padded.shape[1] - 2
+    return [padded[dy:dy+rows, dx:dx+cols]
+            for dy in (0,1,2)
+            for dx in (0,1,2)
+            if (dy,dx) != (1,1)]
+
+'''
+ (H17.) applyRule: numpyArray numpyArray numpyArray -> Effect
+---------------------------------------------------------------
+ 
+ Applies the Game of Life rules to a board from the number of
+ alive neighbours of each cell.
+ 
+ Notes
+ -----
+ * A cell is alive in the next generation if its neighbours
+   or'ed with itself make 3, that is 3 neighbours, or 2
+   neighbours and alive, so the rules are two passes over the
+   cells without any temporary arrays
+ * [sumNeighbors] is overwritten
+ 
+ Required Parameters
+ -------------------
+ * sumNeighbors: numpyArray
+         The number of alive neighbours of each cell.
+ * board: numpyArray
+         The current board of dead (0) and alive (1) cells.
+ * out: numpyArray
+         An array of the same shape as [board] to hold the
+         next generation.
+ 
+ Effects
+ -------
+ Mutates [out] with the next generation of [board]
+
+---------------------------------------------------------------
+'''
+def applyRule(sumNeighbors, board, out):
+    numpy.bitwise_or(sumNeighbors, board, out=sumNeighbors)
+    numpy.equal(sumNeighbors, 3, out=out)
+
+'''
+ (H18.) readCache: str str gdalBand -> numpyArray/None
+---------------------------------------------------------------
+ 
+ Maps the cached cells of a raster band into memory, if the
+ cache can still be used for the band.
+ 
+ Notes
+ -----
+ * The cache must be newer than the raster, strictly, as file
+   times may only be kept to the second
+ * The cache must have the size of the raster and the data
+   type of the band, so a replaced raster with an older time
+   is not read from the cache of the last one
+ * A cache that can't be read, e.g. partly saved, is unused
+ 
+ Required Parameters
+ -------------------
+ * cachePath: str
+         The path of the .npy cache file.
+ * inRaster: str
+         The path of the raster.
+ * band: gdalBand
+         The open band of the raster.
+ 
+ Output
+ ------
+ Returns the cells mapped copy on write, or None if the cache
+ is missing, older than the raster, or does not match the band
+
+---------------------------------------------------------------
+'''
+def readCache(cachePath, inRaster, band):
+    if not (os.path.exists(cachePath) and
+            os.path.getmtime(cachePath) > os.path.getmtime(inRaster)):
+        return None
+    try:
+        array = numpy.load(cachePath, mmap_mode="c")
+    except (IOError, ValueError, EOFError):
+        return None
+    dtype = gdal_array.GDALTypeCodeToNumericTypeCode(band.DataType)
+    if array.shape != (band.YSize, band.XSize) or array.dtype != dtype:
+        return None
+    return array
+
+'''
+ (H19.) writeCache: str numpyArray -> Effect
+---------------------------------------------------------------
+ 
+ Saves the cells of a raster band as a .npy cache file.
+ 
+ Notes
+ -----
+ * The cells are saved to a temporary file that is then
+   renamed, so the cache is never left partly saved
+ * The cache is only an optimisation, so if it can't be
+   saved, e.g. in a read only folder, it is skipped
+ 
+ Required Parameters
+ -------------------
+ * cachePath: str
+         The path of the .npy cache file.
+ * array: numpyArray
+         The cells of the raster band.
+ 
+ Effects
+ -------
+ Creates or replaces the cache file at [cachePath], if it can
 
 ---------------------------------------------------------------
 '''
-def xyOffset (x, y, rasterOrigin, cellWidth, cellHeight):
-    xOffset = int((x - rasterOrigin[0])/cellWidth) ## X
-    yOffset = int(((y+1) - rasterOrigin[1])/cellHeight) ## Y
-    return (xOffset, yOffset)
+def writeCache(cachePath, array):
+    tempPath = cachePath + ".tmp"
+    try:
+        with open(tempPath, "wb") as tempFile:
+            numpy.save(tempFile, array)
+        if os.name == 'nt' and os.path.exists(cachePath):
+            os.remove(cachePath) ## rename does not replace on Windows
+        os.rename(tempPath, cachePath)
+    except (IOError, OSError):
+        try:
+            os.remove(tempPath)
+        except OSError:
+            pass
 
 '''
- (H3.) createDirectory: str -> Effect
+ (H20.) wrapBorder: numpyArray -> Effect
 ---------------------------------------------------------------
  
- Creates a directory.
+ Refills the border of a padded board with its wrapped edges,
+ without copying the cells inside the border.
+ 
+ Notes
+ -----
+ * The rows are wrapped first and the columns then copied with
+   them, which also fills the corners
  
  Required Parameters
  -------------------
- * directory: str
-         The path to create the folder at.
+ * padded: numpyArray
+         A board with a border of one cell around it.
  
  Effects
  -------
- Creates a folder at the [directory], it the folder does
- not exist.
+ Mutates the border of [padded]
 
 ---------------------------------------------------------------
 '''
-def createDirectory(directory):    
-    if not os.path.exists(directory):
-	os.makedirs(directory)
-    return directory
+def wrapBorder(padded):
+    padded[0,1:-1] = padded[-2,1:-1] ## top border from the last row
+    padded[-1,1:-1] = padded[1,1:-1] ## bottom border from the first row
+    padded[:,0] = padded[:,-2] ## left border from the last column
+    padded[:,-1] = padded[:,1] ## right border from the first column
 
 # =============================================================
 # C. Classes
@@ -185,7 +1015,7 @@ def createDirectory(directory):
 
 '''
  (1.) Cells: (str/int/float/None) int int (float, float)
-              int int float float -> Object
+              int int float float int bool dtype -> Object
 -------------------------------------------------------------
 
  A cells object obtained from a raster image file with a
@@ -198,6 +1028,15 @@ def createDirectory(directory):
  * An appropriate EPSG number must be set, the default is 4326
  * If no input directory is specified, a random raster will be
    used
+ * Arrays read from a raster keep the data type of its band,
+   and filled arrays the type of the number, so values set on
+   integer cells are truncated
+ * Cached arrays are mapped copy on write, so modifying the
+   cells never changes the cache file
+ * Geographic offsets multiply by the inverse cell sizes, so a
+   coordinate exactly on a cell boundary can land one cell over
+   from xyOffset, e.g. x=0.3 with a 0.1 cell width is column 3
+   here and 2 with xyOffset
 
  Optional Parameters
  -------------------
@@ -220,6 +1059,19 @@ def createDirectory(directory):
          The pixel width of the raster.
  * pixelHeight: float
 	The pixel height of the raster.
+ * seed: int
+         The seed of the random raster, None for a different
+         raster each time.
+ * cache: bool
+         Whether or not to cache the cells of a raster read
+         from a str path.
+           - If True, save the cells next to the raster as a
+             .npy file, and map that file into memory when the
+             unchanged raster is read again
+           - If False, always read the cells from the raster
+ * dtype: numpy dtype
+         The data type of the cells, None to keep the data
+         type of the raster band, number, or list.
    
  Object Attributes
  -----------------
@@ -237,6 +1089,12 @@ def createDirectory(directory):
          [pixelWidth]
  * self.cellHeight: float
          [pixelHeight]
+ * self.invCellWidth: float
+         The inverse of [self.cellWidth]
+ * self.invCellHeight: float
+         The inverse of [self.cellHeight]
+ * self._ox, self._oy: float
+         The [self.origin] used by geographic offsets
  
  Object Methods
  --------------
@@ -247,6 +1105,28 @@ def createDirectory(directory):
  * (1.3) toRaster
          Convert the array into a geotif raster, with changes if 
          applicable.
+ * (1.4) modifyBulk
+         Modify the values of all cells selected by a mask.
+ * (1.5) getIJ
+         Get a cell's value by its array reference.
+ * (1.6) modifyIJ
+         Modify a cell's value by its array reference.
+ * (1.7) modifyRegion
+         Modify the values of many cells at once.
+ * (1.8) getRegion
+         Get the values of many cells at once.
+ * (1.9) __getitem__
+         Get cells by array reference as cellsObject[x, y].
+ * (1.10) __setitem__
+         Modify cells by array reference as cellsObject[x, y].
+ * (1.11) _offset
+         Calculate the array references of a geographic location.
+ * (1.12) fromArray
+         Create cells from a numpy array already in memory.
+ * (1.13) origin, cellWidth, cellHeight
+         Properties updating the offset constants when set.
+ * (1.14) _setAttributes
+         Set the attributes from the array and raster settings.
 
 -------------------------------------------------------------
 '''
@@ -262,16 +1142,18 @@ class Cells (object):
                  cols=10,
                  rows=10,
                  pixelWidth=1,
-                 pixelHeight=1):
+                 pixelHeight=1,
+                 seed=None,
+                 cache=False,
+                 dtype=None):
         
 	# (1.0.0) Default Random Cells
 	if inRaster == None:
-	    array = numpy.random.randint(2,size = (rows,cols))
+	    array = randomBoard(rows, cols, seed)
 	
 	# (1.0.1) Cell Filled with Numbers
 	elif isinstance(inRaster,(int, long, float, complex)):
-	    array = numpy.zeros((rows,cols))
-	    array.fill(inRaster)
+	    array = numpy.full((rows,cols), inRaster, dtype=dtype)
 	
 	# (1.0.2) Custom Cell with List
 	elif isinstance(inRaster,(list, tuple)):
@@ -294,16 +1176,23 @@ class Cells (object):
 	    pixelHeight =  geotransform[5] ## cell size y
 	    
 	    # (1.0.3b) Obtain Array Data     
-	    array = band.ReadAsArray(0, 0, cols, rows).astype(numpy.float)
+	    ## kept in the band data type, bytes for game of life boards
+	    ## the cache is used while it is newer and matches the band
+	    cachePath = inRaster + ".b" + str(nband) + ".npy"
+	    array = None
+	    if cache:
+		array = readCache(cachePath, inRaster, band)
+	    if array is None:
+		array = band.ReadAsArray(0, 0, cols, rows)
+		if cache:
+		    writeCache(cachePath, array)
+	
+	# (1.0.4) Convert to the Requested Data Type
+	if dtype is not None:
+	    array = array.astype(dtype, copy=False)
         
-        # (1.0.4) Attributes
-        self.array = array
-        self.EPSG = EPSG
-        self.cols = cols
-        self.rows= rows
-        self.origin = rasterOrigin
-        self.cellWidth = pixelWidth
-        self.cellHeight = pixelHeight
+        # (1.0.5) Attributes
+        self._setAttributes(array, rasterOrigin, pixelWidth, pixelHeight, EPSG)
      
     '''
      (1.1) modify: int int float bool -> Effect
@@ -339,19 +1228,13 @@ class Cells (object):
         
         # (1.1.1) Calculate XY Geographic Offsets If Needed
 	if geographic:
-	    Offsets = xyOffset (x,
-		               y,
-		               self.origin,
-		               self.cellWidth,
-		               self.cellHeight)
-	else:
-	    Offsets = (x,y)
+	    x, y = self._offset(x, y)
         
         # (1.1.2) Modify Array
-        self.array[Offsets[1],Offsets[0]] = value
+        self.array[y,x] = value
 	
     '''
-     (1.2) get: int int bool -> float
+     (1.2) get: int int bool -> float/int
     --------------------------------------------------------
      
      Obtains the value of the cell at the user specified
@@ -382,16 +1265,10 @@ class Cells (object):
         
         # (1.2.1) Calculate XY Geographic Offsets If Needed
 	if geographic:
-	    Offsets = xyOffset (x,
-		                y,
-		                self.origin,
-		                self.cellWidth,
-		                self.cellHeight)
-	else:
-	    Offsets = (x,y)
+	    x, y = self._offset(x, y)
                 
         # (1.2.2) Return Cell Value        
-        return self.array[Offsets[1],Offsets[0]] 
+        return self.array[y,x] 
     
     '''
      (1.3) toRaster: str -> Effect
@@ -421,10 +1298,366 @@ class Cells (object):
                      self.cellWidth,
                      self.cellHeight,
                      self.EPSG)
+    
+    '''
+     (1.4) modifyBulk: numpyArray float -> Effect
+    --------------------------------------------------------
+    
+     Modifies all cells selected by a mask with a new value
+     set by the user, in a single array assignment.
+     
+     Required Parameters
+     -------------------
+     * mask: numpyArray
+             A boolean array with the same shape as
+             [self.array], True where cells are modified.
+     * value: float/int
+             The value to be set at the [mask] locations
+         
+     Effects
+     -------
+     Mutates the [self.array] field where [mask] is True
+    
+    --------------------------------------------------------
+    '''
+    def modifyBulk(self, mask, value):
+        self.array[mask] = value
+    
+    '''
+     (1.5) getIJ: int int -> float/int
+    --------------------------------------------------------
+     
+     Obtains the value of the cell at the user specified
+     array reference, without geographic offsets.
+     
+     Required Parameters
+     -------------------
+     * x: int
+             The x-axis, column, array reference.
+     * y: int
+             The y-axis, row, array reference.
+	 
+     Output
+     ------
+     Returns the value at the [x] and [y] location
+    
+    --------------------------------------------------------
+    '''
+    def getIJ(self, x, y):
+        return self.array[y,x]
+    
+    '''
+     (1.6) modifyIJ: int int float -> Effect
+    --------------------------------------------------------
+     
+     Modifies the cell at the user specified array reference
+     with a new value, without geographic offsets.
+     
+     Required Parameters
+     -------------------
+     * x: int
+             The x-axis, column, array reference.
+     * y: int
+             The y-axis, row, array reference.
+     * value: float/int
+             The value to be set at the [x] and [y] location
+	 
+     Effects
+     -------
+     Mutates the [self.array] field at [x] and [y]
+    
+    --------------------------------------------------------
+    '''
+    def modifyIJ(self, x, y, value):
+        self.array[y,x] = value
+    
+    '''
+     (1.7) modifyRegion: (listof float) (listof float)
+                         (listof float) bool -> Effect
+    --------------------------------------------------------
+     
+     Modifies many cells at once, calculating the offsets of
+     all locations together with numpy.
+     
+     Required Parameters
+     -------------------
+     * xs: (listof float)
+             The x-axis, column, references.
+     * ys: (listof float)
+             The y-axis, row, references.
+     * values: (listof float)/float
+             The values to be set at the [xs] and [ys]
+	     locations, or one value for all of them
+    
+     Optional Parameters
+     -------------------
+     * geographic: bool
+             Set to determine if [xs] and [ys] are geographic
+	     coordinates instead of array references.
+	       - If True, [xs][ys] are geographic references
+	       - If False, [xs][ys] are array references
+	 
+     Effects
+     -------
+     Mutates the [self.array] field at [xs] and [ys]
+       
+    --------------------------------------------------------
+    '''
+    def modifyRegion(self, xs, ys, values, geographic=True):
+        
+        # (1.7.1) Calculate XY Geographic Offsets If Needed
+        xs = numpy.asarray(xs)
+        ys = numpy.asarray(ys)
+        if geographic:
+            xs = ((xs - self._ox)*self.invCellWidth).astype(numpy.intp)
+            ys = ((ys - self._oy)*self.invCellHeight).astype(numpy.intp)
+        
+        # (1.7.2) Modify Array
+        self.array[ys,xs] = values
+    
+    '''
+     (1.8) getRegion: (listof float) (listof float) bool
+                      -> numpyArray
+    --------------------------------------------------------
+     
+     Obtains the values of many cells at once, calculating
+     the offsets of all locations together with numpy.
+     
+     Required Parameters
+     -------------------
+     * xs: (listof float)
+             The x-axis, column, references.
+     * ys: (listof float)
+             The y-axis, row, references.
+    
+     Optional Parameters
+     -------------------
+     * geographic: bool
+             Set to determine if [xs] and [ys] are geographic
+	     coordinates instead of array references.
+	       - If True, [xs][ys] are geographic references
+	       - If False, [xs][ys] are array references
+	 
+     Output
+     ------
+     Returns a numpy array of the values at the [xs] and
+     [ys] locations
+    
+    --------------------------------------------------------
+    '''
+    def getRegion(self, xs, ys, geographic=True):
+        
+        # (1.8.1) Calculate XY Geographic Offsets If Needed
+        xs = numpy.asarray(xs)
+        ys = numpy.asarray(ys)
+        if geographic:
+            xs = ((xs - self._ox)*self.invCellWidth).astype(numpy.intp)
+            ys = ((ys - self._oy)*self.invCellHeight).astype(numpy.intp)
+        
+        # (1.8.2) Return Cell Values
+        return self.array[ys,xs]
+    
+    '''
+     (1.9) __getitem__: (int, int) -> float/int
+    --------------------------------------------------------
+     
+     Obtains the values of cells by array reference with
+     cellsObject[x, y], without geographic offsets.
+     
+     Required Parameters
+     -------------------
+     * key: (int, int)
+             The x-axis, column, and y-axis, row, array
+	     references, either may be a slice.
+	 
+     Output
+     ------
+     Returns the value, or array of values, at the [key]
+     location
+    
+    --------------------------------------------------------
+    '''
+    def __getitem__(self, key):
+        return self.array[key[1],key[0]]
+    
+    '''
+     (1.10) __setitem__: (int, int) float -> Effect
+    --------------------------------------------------------
+     
+     Modifies the values of cells by array reference with
+     cellsObject[x, y] = value, without geographic offsets.
+     
+     Required Parameters
+     -------------------
+     * key: (int, int)
+             The x-axis, column, and y-axis, row, array
+	     references, either may be a slice.
+     * value: float/int
+             The value to be set at the [key] location
+	 
+     Effects
+     -------
+     Mutates the [self.array] field at [key]
+    
+    --------------------------------------------------------
+    '''
+    def __setitem__(self, key, value):
+        self.array[key[1],key[0]] = value
+    
+    '''
+     (1.11) _offset: float float -> (int, int)
+    --------------------------------------------------------
+     
+     Calculates the array references of a geographic
+     location, with the origin and inverse cell sizes saved
+     when they are set instead of passed to xyOffset.
+     
+     Required Parameters
+     -------------------
+     * x: float
+             The x-axis, column, geographic reference.
+     * y: float
+             The y-axis, row, geographic reference.
+	 
+     Output
+     ------
+     Returns the (x, y) array references
+    
+    --------------------------------------------------------
+    '''
+    def _offset(self, x, y):
+        return (int((x - self._ox)*self.invCellWidth),
+                int((y - self._oy)*self.invCellHeight))
+    
+    '''
+     (1.12) fromArray: numpyArray (float, float) float float
+                       int -> Object
+    --------------------------------------------------------
+     
+     Creates a cells object from a numpy array that is
+     already in memory, without reading a raster.
+     
+     Notes
+     -----
+     * The array is used as is, not copied
+     
+     Required Parameters
+     -------------------
+     * array: numpyArray
+             The 2D array of cell values.
+    
+     Optional Parameters
+     -------------------
+     * rasterOrigin: (float, float)
+             The geographic origin coordinates of the array.
+     * pixelWidth: float
+             The pixel width of the array.
+     * pixelHeight: float
+             The pixel height of the array.
+     * EPSG: int
+             The spatial reference system number of the array.
+	 
+     Output
+     ------
+     Returns a cells object with [array] as [self.array]
+    
+    --------------------------------------------------------
+    '''
+    @classmethod
+    def fromArray(cls,
+                  array,
+                  rasterOrigin=(0,0),
+                  pixelWidth=1,
+                  pixelHeight=1,
+                  EPSG=4326):
+        cells = cls.__new__(cls) ## skip reading a raster
+        cells._setAttributes(array, rasterOrigin, pixelWidth, pixelHeight, EPSG)
+        return cells
+    
+    '''
+     (1.13) origin, cellWidth, cellHeight: properties
+    --------------------------------------------------------
+     
+     The origin and cell sizes of the cells, which save the
+     constants of the geographic offsets whenever they are
+     set, so offsets always use the current values.
+     
+     Effects
+     -------
+     Setting [self.origin] updates [self._ox] and [self._oy],
+     setting [self.cellWidth] or [self.cellHeight] updates
+     [self.invCellWidth] or [self.invCellHeight]
+    
+    --------------------------------------------------------
+    '''
+    @property
+    def origin(self):
+        return self._origin
+    
+    @origin.setter
+    def origin(self, rasterOrigin):
+        self._origin = rasterOrigin
+        self._ox = rasterOrigin[0]
+        self._oy = rasterOrigin[1] - 1 ## origin less the row shift
+    
+    @property
+    def cellWidth(self):
+        return self._cellWidth
+    
+    @cellWidth.setter
+    def cellWidth(self, pixelWidth):
+        self._cellWidth = pixelWidth
+        self.invCellWidth = 1.0/pixelWidth ## multiplied for offsets
+    
+    @property
+    def cellHeight(self):
+        return self._cellHeight
+    
+    @cellHeight.setter
+    def cellHeight(self, pixelHeight):
+        self._cellHeight = pixelHeight
+        self.invCellHeight = 1.0/pixelHeight
+    
+    '''
+     (1.14) _setAttributes: numpyArray (float, float) float
+                            float int -> Effect
+    --------------------------------------------------------
+     
+     Sets the attributes of the cells from their array and
+     raster settings, for both initialization and fromArray.
+     
+     Required Parameters
+     -------------------
+     * array: numpyArray
+             The 2D array of cell values.
+     * rasterOrigin: (float, float)
+             The geographic origin coordinates of the array.
+     * pixelWidth: float
+             The pixel width of the array.
+     * pixelHeight: float
+             The pixel height of the array.
+     * EPSG: int
+             The spatial reference system number of the array.
+	 
+     Effects
+     -------
+     Sets the object attributes, the number of rows and
+     columns from the shape of [array]
+    
+    --------------------------------------------------------
+    '''
+    def _setAttributes(self, array, rasterOrigin, pixelWidth, pixelHeight,
+                       EPSG):
+        self.array = array
+        self.EPSG = EPSG
+        self.rows, self.cols = array.shape
+        self.origin = rasterOrigin
+        self.cellWidth = pixelWidth
+        self.cellHeight = pixelHeight ## also sets the offset constants
 	
 '''
  (2.) GameofLife: str int str int (float,float) int int
-                  float float bool str -> Object
+                  float float bool str int -> Object
 -------------------------------------------------------------
 
  Based on Conway's Game of Life, creates a game of life object
@@ -463,10 +1696,13 @@ class Cells (object):
  * overwrite: bool
          Whether or not to overwrite cycled raster.
 	   - If True, overwrite and don't save cycles
-	   - If False, save cycles at [outDirectory]
+	   - If False, save cycles at [outDirectory]/cycles
  * qmlStyle: str
          The style file to be used to visualize
 	 the [raster] and its cycles.
+ * seed: int
+         The seed of the random starting board, None for a
+	 different board each time.
 	 
  Object Attributes
  -----------------
@@ -475,7 +1711,10 @@ class Cells (object):
  * self.inRaster: str
          Path to the raster to be cycled.
  * self.output: str
-         Path to the output cycled raster at [outDirectory]
+         Path to the output directory [outDirectory]
+ * self.cycleOutput: str
+         Path to the output cycled rasters, in a "cycles"
+	 folder at [outDirectory]
  * self.cycles: int
          The cycle count so far.
  * self.board: obj
@@ -486,6 +1725,16 @@ class Cells (object):
          [overwrite]
  * self.style: str
          [qmlStyle]
+ * self.n_jobs: int
+         The number of threads to cycle tiles of large boards
+	 with, the number of processors by default.
+ * self.compiled: bool
+         Whether or not to cycle with a C step compiled for
+	 the board size, requires cffi and a C compiler.
+ * self.packed: bool
+         Whether or not to cycle the board packed as bits.
+	   - If True, pack 64 cells per word while cycling
+	   - If False, cycle the board with one cell per byte
  * self.EPSG: int
          [EPSG]
  * self.band: int
@@ -497,6 +1746,12 @@ class Cells (object):
          Cycle the board a number of times.
  * (2.2) reset
          Reset current board to the starting board.
+ * (2.3) run
+         Cycle the board a number of times without display.
+ * (2.4) animate
+         Cycle and display the board without blocking QGIS.
+ * (2.5) _display
+         Replace the displayed board with a cycle raster.
 
 -------------------------------------------------------------
 '''
@@ -517,7 +1772,8 @@ class GameofLife (object):
                  overwrite=True,
                  qmlStyle=os.path.join(
                      os.path.dirname(os.path.realpath(__file__)),
-                     "GameofLife_Style.qml")):
+                     "GameofLife_Style.qml"),
+                 seed=None):
 	
 	# (2.0.1) Create Default Path at Script Directory
 	if out_directory == None:
@@ -529,7 +1785,7 @@ class GameofLife (object):
         
         # (2.0.1) Create Random Raster if no raster settings defined
         if raster == None:
-	    random_array = numpy.random.randint(2,size = (height,width))
+	    random_array = randomBoard(height, width, seed)
             rasterPath = os.path.join(outPath,"start.tif")
             Array2Raster(random_array,
                          rasterPath,
@@ -537,10 +1793,18 @@ class GameofLife (object):
                          cellWidth,
                          cellHeight,
                          EPSG)
+	    board = Cells.fromArray(random_array, ## no need to read it back
+	                            origin,
+	                            cellWidth,
+	                            cellHeight,
+	                            EPSG)
         
         # (2.0.2) Otherwise use the Raster Defined by the User
         else:
             rasterPath = raster
+	    board = Cells(rasterPath, band, EPSG)
+	    ## alive (1) where not 0, e.g. 255, the same for every step
+	    board.array = (board.array != 0).view(numpy.uint8)
 	    
 	# (2.0.3) Add Raster to Display
 	startLayer = QgsRasterLayer(rasterPath, "start")
@@ -551,18 +1815,26 @@ class GameofLife (object):
 	self.startRaster = rasterPath
         self.inRaster = rasterPath
         self.output = outPath
+	self.cycleOutput = createDirectory(os.path.join(outPath, "cycles"))
 	self.cycles=0
-        self.board = Cells(rasterPath, band, EPSG)
+        self.board = board
         self.speed = 0.65 ## delay in seconds after creating each cycle
 	self.overwrite = overwrite ## whether or not to overwrite each cycle
 	self.style = qmlStyle ## raster legend style
+	self.packed = False ## whether or not to cycle a bit packed board
+	self.compiled = False ## whether or not to compile a C step
+	self.n_jobs = multiprocessing.cpu_count() ## threads for tiled cycles
+	self._outDataset = None ## open raster of overwritten cycles
+	self._layerId = startLayer.id() ## displayed layer to replace
+	self._animation = 0 ## number of the running animation
+	self._buf = numpy.empty(self.board.array.shape, dtype=numpy.uint8) ## spare board
 	
 	# (2.0.6) Sub Attribute Settings
 	self.EPSG = EPSG
 	self.band = band
 	
     '''
-     (2.1) cycle: int int -> Effect
+     (2.1) cycle: int int bool int bool -> Effect
     --------------------------------------------------------
     
      Cycles through the game of life board a number of times
@@ -570,8 +1842,17 @@ class GameofLife (object):
      
      Notes
      -----
-     Modified from code provided by Dr. Claus Rinner @
-     Ryerson University
+     * Modified from code provided by Dr. Claus Rinner @
+       Ryerson University
+     * Neighbours are counted over the whole board at once
+       with lifeStep if numba is available, lifeConvolve if
+       scipy is available, and lifeHalo (lifeTiled for boards
+       over 512 by 512 cells, in [n_jobs] threads) otherwise,
+       instead of a loop over each cell
+     * If [self.packed] is True, the board is cycled with
+       lifeBits and only unpacked when saved
+     * If [self.compiled] is True, the board is cycled with
+       a C step from compileLife
      
      Optional Parameters
      -------------------
@@ -580,84 +1861,142 @@ class GameofLife (object):
      * jump: int
 	     The jumps made for each interval it 
 	     reaches [n]
+     * display: bool
+             Whether or not to display the cycled rasters.
+	       - If True, add each saved cycle to the map
+	       - If False, only save the cycles at [self.cycleOutput]
+     * n_jobs: int
+             The number of threads to cycle tiles of large
+	     boards with, [self.n_jobs] if None.
+     * verbose: bool
+             Whether or not to print each saved cycle and the
+	     average cycle time.
 	     
      Effect
      ------
      Creates cycled raster(s) as a geotif (.tif) at the
-     [self.output] directory, updates [self.cycles],
-     [self.inRaster], and [self.board]
+     [self.cycleOutput] directory every [jump] cycles, updates
+     [self.cycles], [self.inRaster], and [self.board]
     
     --------------------------------------------------------
     '''
-    def cycle(self, n=1,jump=1):
+    def cycle(self, n=1,jump=1,display=True,n_jobs=None,verbose=True):
         
-        # (2.1.1) Cycle Cells of Game Board n Times
+	# (2.1.1) Cycle Cells of Game Board n Times
 	sumTime = 0
-	rows = self.board.rows
-	cols = self.board.cols
 	iterations = (n*jump)+1
-	for cyclenum in range(1,iterations):
-	     ## store copy of original cells
-	    inBoard = Cells(self.inRaster,nband=self.band,EPSG=self.EPSG)
-	    start_time = time.time() ## start cycle time
+	## bit packed board, or C step if compiled, or numba kernel if
+	## available, or convolution if scipy is available, or padded
+	## (tiled if large) boards otherwise
+	cols = self.board.array.shape[1]
+	if n_jobs is None:
+	    n_jobs = self.n_jobs
+	pool = None
+	if self.packed:
+	    step = lambda board, out: lifeBits(board, out, cols)
+	elif self.compiled and cffi is not None:
+	    step = compileLife(self.board.array.shape[0], cols)
+	elif njit is not None:
+	    step = lifeStep
+	elif convolve is not None:
+	    step = lifeConvolve
+	elif self.board.array.size > 512*512: ## larger than the cache
+	    if n_jobs > 1: ## share the tiles between threads
+		pool = ThreadPool(n_jobs)
+	    step = lambda board, out: lifeTiled(board, out, pool=pool)
+	else: ## padded boards, made with the double buffer below
+	    step = lifeHalo
+	## double buffer, each cycle is computed into the other board
+	if self.packed:
+	    board = packBoard(self.board.array)
+	else:
+	    board = numpy.ascontiguousarray(self.board.array, dtype=numpy.uint8)
+	## the spare board is kept between calls and only made if needed
+	if (self._buf.shape != board.shape or self._buf.dtype != board.dtype or
+	    not self._buf.flags.c_contiguous):
+	    self._buf = numpy.empty_like(board)
+	out = self._buf
+	## both boards are the insides of paddings made once, so each
+	## cycle only refills the border of the board it reads
+	if step is lifeHalo:
+	    pads = [numpy.empty((board.shape[0]+2, cols+2), dtype=numpy.uint8)
+	            for k in (0,1)]
+	    pads[0][1:-1,1:-1] = board
+	    board = pads[0][1:-1,1:-1]
+	    out = pads[1][1:-1,1:-1]
+	    halos = {id(board): (pads[0], haloViews(pads[0])),
+	             id(out): (pads[1], haloViews(pads[1]))}
+	    step = lambda board, out: lifeHalo(board, out, *halos[id(board)])
+	## close the threads and keep the spare board even if stopped
+	try:
+	    for cyclenum in xrange(1,iterations):
+		start_time = time.time() ## start cycle time
 	    
-	    # (2.1.1) Keep track of number of cycles
-	    if cyclenum%jump == 0:
-		self.cycles+=jump
-		print "Cycle: " + str(cyclenum)
+		# (2.1.1) Keep track of number of cycles
+		if cyclenum%jump == 0:
+		    self.cycles+=jump
+		    if verbose:
+			print "Cycle: " + str(cyclenum)
 		
-	    # (2.1.1) Iterate All Cells on Board n Times
-	    for i in range(0, rows): 
-		for j in range(0, cols):
-		    sumNeighbors = 0 ## counter for neighbors
-		    boardValue = inBoard.get(j,i,geographic=False)
-
-		    # (2.1.1) Count Neighbours
-		    for k in range(i-1, i+2): 
-			for l in range(j-1, j+2):
-			    ## Only count neighbours and not the cell itself
-			    if (l,k) != (j,i):
-				sumNeighbors = sumNeighbors+inBoard.get(l%cols,
-				                                        k%rows,
-				                                        geographic=False)
-			
-		    # (2.1.2a) Alive Cells
-		    if boardValue == 1:
-			## Under-population
-			if sumNeighbors < 2:
-			    self.board.modify(j,i,0,geographic=False)
-			## Over-crowding
-			elif sumNeighbors > 3:
-			    self.board.modify(j,i,0,geographic=False)
-		    
-		    # (2.1.2b) Reproduction
-		    elif boardValue == 0 and sumNeighbors == 3:
-			self.board.modify(j,i,1,geographic=False)
+		# (2.1.2) Count Neighbours and Apply Rules to All Cells
+		step(board, out)
+		board, out = out, board
+		if not self.packed:
+		    self.board.array = board
 	
-	    # (2.1.3) Save Cycle as Raster
-	    ## Overwrite Raster if needed
-	    if self.overwrite:
-		outLayer = "cycle"
-	    ## Otherwise Produce Rasters
-	    else:
-		outLayer = "cycle"+str(self.cycles)
-	    ## Set input raster to new cycle
-	    outCyclePath = os.path.join(self.output,
-	                                outLayer+".tif")
-	    self.board.toRaster(outCyclePath)
-	    self.board = Cells(outCyclePath,self.band,self.EPSG)
-	    self.inRaster = outCyclePath
+		# (2.1.3) Save Cycle as Raster Every Jump
+		## board stays in memory, only frames at each jump are written
+		if (cyclenum%jump == 0) or cyclenum+1 == iterations:
+		    ## packed boards are only unpacked when saved
+		    if self.packed:
+			self.board.array = unpackBoard(board, cols)
+		    ## Overwrite Raster if needed
+		    if self.overwrite:
+			outLayer = "cycle"
+		    ## Otherwise Produce Rasters
+		    else:
+			outLayer = "cycle"+str(self.cycles)
+		    ## Set input raster to new cycle
+		    outCyclePath = os.path.join(self.cycleOutput,
+						outLayer+".tif")
+		    ## reuse the open overwritten raster, rewriting its cells
+		    if self.overwrite:
+			rows = self.board.array.shape[0]
+			outTransform = (self.board.origin[0], self.board.cellWidth, 0,
+			                self.board.origin[1], 0, self.board.cellHeight)
+			## made again if the path, size, or geotransform changed
+			if (self._outDataset is None or
+			    self._outDataset.GetDescription() != outCyclePath or
+			    self._outDataset.RasterXSize != cols or
+			    self._outDataset.RasterYSize != rows or
+			    tuple(self._outDataset.GetGeoTransform()) != outTransform):
+			    self._outDataset = None ## close before replacing
+			    self._outDataset = createRaster(outCyclePath,
+							    cols,
+							    rows,
+							    self.board.origin,
+							    self.board.cellWidth,
+							    self.board.cellHeight,
+							    self.EPSG,
+							    compress=False)
+			Array2Dataset(self.board.array, self._outDataset)
+		    else:
+			self.board.toRaster(outCyclePath)
+		    self.inRaster = outCyclePath
 	
-	    # (2.1.4) Display the Saved Raster Cycle
-	    if (cyclenum%jump == 0) or cyclenum+1 == iterations:
-		if self.overwrite: ## remove layer displays if overwriting
-		    QgsMapLayerRegistry.instance().removeAllMapLayers()
-		rlayer = QgsRasterLayer(outCyclePath, outLayer)
-		rlayer.loadNamedStyle(self.style)
-		QgsMapLayerRegistry.instance().addMapLayer(rlayer)
-		time.sleep(self.speed) ## suspend display
-	    sumTime += (time.time() - start_time) ## end time cycles
-	print "Average Cycle Time: " + str(round(sumTime/n,2)) + " sec"
+		    # (2.1.4) Display the Saved Raster Cycle
+		    if display:
+			self._display(outCyclePath, outLayer)
+			time.sleep(self.speed) ## suspend display
+		sumTime += (time.time() - start_time) ## end time cycles
+	finally:
+	    self._buf = out ## keep the spare board for the next call
+	    if pool is not None:
+		pool.close()
+		pool.join()
+	## averaged over every cycle, none if no cycles were run
+	if verbose:
+	    print "Average Cycle Time: " + str(round(sumTime/max(n*jump,1),2)) + " sec"
 	
     '''		
     (2.2) reset -> Effect
@@ -667,8 +2006,9 @@ class GameofLife (object):
      
      Effect
      ------
-     Updates [self.inRaster] to the [self.startRaster] and
-     resets [self.cycles] and [self.board]
+     Updates [self.inRaster] to the [self.startRaster],
+     resets [self.cycles] and [self.board], and deletes the
+     cycled rasters at [self.cycleOutput]
     
     --------------------------------------------------------
     '''
@@ -679,18 +2019,122 @@ class GameofLife (object):
 	self.cycles=0
 	self.inRaster=self.startRaster
 	self.board=Cells(self.startRaster,self.band,self.EPSG)
+	self.board.array = (self.board.array != 0).view(numpy.uint8) ## 0 or 1
+	self._outDataset = None ## close the cycle raster before deleting
 	startLayer = QgsRasterLayer(self.inRaster, "start")
 	startLayer.loadNamedStyle(self.style)
 	QgsMapLayerRegistry.instance().addMapLayer(startLayer)
+	self._layerId = startLayer.id()
+	self._animation += 1 ## stop any running animation
 	
 	# (2.2.2) Delete the Cycle Files
-	for the_file in os.listdir(self.output):
-	    file_path = os.path.join(self.output, the_file)
-	    if "cycle" in file_path:
-		## Try to delete cycle files
-		try:
-		    os.remove(file_path)
-		## Notify if unable to delete cycle file
-		except Exception:
-		    basename = os.path.basename(os.path.splitext(file_path)[0])
-		    print ("**Unable to Delete Cycle Raster: "+basename)
+	## cycles have their own folder, deleted as a whole
+	def notify(function, file_path, excinfo):
+	    ## Notify if unable to delete cycle file
+	    if file_path != self.cycleOutput:
+		basename = os.path.basename(os.path.splitext(file_path)[0])
+		print ("**Unable to Delete Cycle Raster: "+basename)
+	shutil.rmtree(self.cycleOutput, onerror=notify)
+	createDirectory(self.cycleOutput)
+    
+    '''
+    (2.3) run: int -> Effect
+    --------------------------------------------------------
+    
+     Cycles through the game of life board a number of times
+     (n) without displaying or saving the boards in between,
+     for running many cycles as fast as possible.
+     
+     Optional Parameters
+     -------------------
+     * n: int
+             The number of times to cycle the board.
+	     
+     Effect
+     ------
+     Creates the last cycled raster as a geotif (.tif) at the
+     [self.cycleOutput] directory, updates [self.cycles],
+     [self.inRaster], and [self.board]
+    
+    --------------------------------------------------------
+    '''
+    def run (self, n=1):
+	self.cycle(1, n, display=False) ## one jump of n cycles
+    
+    '''
+     (2.4) animate: int int -> Effect
+    --------------------------------------------------------
+    
+     Cycles through the game of life board a number of times
+     (n), displaying each saved board [self.speed] seconds
+     after the last one with a Qt timer instead of sleeping,
+     so QGIS can draw the boards while the game runs.
+     
+     Notes
+     -----
+     * Returns after the first board, the rest are cycled
+       from the QGIS event loop
+     * Prints the number of cycles of each displayed board
+     * Calling reset or animate again stops the boards still
+       to be displayed
+     
+     Optional Parameters
+     -------------------
+     * n: int
+             The number of boards to display.
+     * jump: int
+             The number of cycles between each displayed
+	     board.
+	     
+     Effect
+     ------
+     Creates cycled rasters as geotifs (.tif) at the
+     [self.cycleOutput] directory and displays them, updates
+     [self.cycles], [self.inRaster], and [self.board]
+    
+    --------------------------------------------------------
+    '''
+    def animate (self, n=1, jump=1):
+	self._animation += 1 ## stop any running animation
+	animation = self._animation
+	def frame(remaining):
+	    if animation != self._animation: ## stopped by reset or animate
+		return
+	    self.cycle(1, jump, display=False, verbose=False)
+	    print "Cycle: " + str(self.cycles)
+	    outLayer = os.path.splitext(os.path.basename(self.inRaster))[0]
+	    self._display(self.inRaster, outLayer)
+	    if remaining > 1: ## schedule the next board
+		QTimer.singleShot(int(self.speed*1000),
+		                  lambda: frame(remaining-1))
+	if n >= 1: ## no boards to display, like cycle(0)
+	    frame(n)
+    
+    '''
+     (2.5) _display: str str -> Effect
+    --------------------------------------------------------
+    
+     Displays a cycle raster, removing the last displayed
+     board first if the cycles are overwritten.
+     
+     Required Parameters
+     -------------------
+     * outCyclePath: str
+             The path of the cycle raster to display.
+     * outLayer: str
+             The name of the displayed layer.
+	     
+     Effect
+     ------
+     Adds the [outCyclePath] raster to the display and keeps
+     its layer id
+    
+    --------------------------------------------------------
+    '''
+    def _display (self, outCyclePath, outLayer):
+	if self.overwrite: ## remove the last layer if overwriting
+	    QgsMapLayerRegistry.instance().removeMapLayer(self._layerId)
+	rlayer = QgsRasterLayer(outCyclePath, outLayer)
+	rlayer.loadNamedStyle(self.style)
+	QgsMapLayerRegistry.instance().addMapLayer(rlayer)
+	self._layerId = rlayer.id()